@@ -5,18 +5,114 @@ Syncs DNS records from YAML files to Cloudflare based on git changes
 """
 
 import os
+import re
 import sys
-import json
+import math
+import time
+import asyncio
+import hashlib
 import yaml
-import requests
+import httpx
+import orjson
 import subprocess
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+# Prefer the libyaml-backed loader; fall back to pure Python where it isn't built
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+@lru_cache(maxsize=None)
+def _load_record(filepath: str) -> Mapping:
+    """Load and validate a DNS record from a YAML file, cached per path"""
+    with open(filepath, 'r') as f:
+        record = yaml.load(f, Loader=SafeLoader)
+
+    # Validate required fields
+    required = ["name", "type", "content"]
+    for field in required:
+        if field not in record:
+            raise ValueError(f"Missing required field '{field}' in {filepath}")
+
+    # Read-only so the cached record can be shared safely
+    return MappingProxyType(record)
+
+
+def _norm(record: Mapping) -> Tuple:
+    """Normalize the synced fields of a record into a comparable tuple, applying defaults"""
+    return (
+        record["content"],
+        record.get("ttl") or 3600,
+        bool(record.get("proxied")),
+        record.get("priority") if record["type"] in ("MX", "SRV") else None,
+    )
+
+
+def _digest(record: Mapping) -> str:
+    """Stable hash of a record's normalized fields"""
+    return hashlib.blake2b(repr(_norm(record)).encode(), digest_size=16).hexdigest()
+
+
+class RateLimiter:
+    """
+    Async token bucket refilling `rate` tokens per `period` seconds
+    Up to `burst` calls go through at once, then callers are paced at the
+    refill rate, so any `period`-long window admits at most burst + rate calls
+    """
+
+    def __init__(self, rate: float, period: float, burst: float):
+        self.capacity = burst
+        self.fill_rate = rate / period
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available (and any pause has passed), then take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.fill_rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds`, e.g. when the server asks us to back off"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
 
 
 class CloudflareAPI:
     """Cloudflare API client for DNS operations"""
 
+    # Transient statuses worth retrying, and the idempotent methods that may be retried
+    # (a 429 was never processed, so it is retried for every method)
+    RETRY_STATUSES = {429, 502, 503, 504}
+    RETRY_METHODS = {"GET", "DELETE"}
+    MAX_RETRIES = 3
+    BACKOFF_FACTOR = 0.3
+    PER_PAGE = 1000
+    # Cloudflare allows 1200 requests per 5 minutes: a burst of 100 plus a
+    # refill of 1000 per 300s keeps any window at 1100, with some headroom
+    RATE_LIMIT = (1000, 300)
+    RATE_BURST = 100
+    # Upper bound on how long a single Retry-After may pause us
+    MAX_RETRY_AFTER = 300.0
+
     def __init__(self, api_token: str, zone_id: str):
         self.api_token = api_token
         self.zone_id = zone_id
@@ -25,34 +121,104 @@ class CloudflareAPI:
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
-
-    def list_records(self) -> List[Dict]:
-        """List all DNS records in the zone"""
-        url = f"{self.base_url}/zones/{self.zone_id}/dns_records"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()["result"]
-
-    def create_record(self, record: Dict) -> Dict:
-        """Create a new DNS record"""
-        url = f"{self.base_url}/zones/{self.zone_id}/dns_records"
-        data = {
-            "type": record["type"],
-            "name": record["name"],
-            "content": record["content"],
-            "ttl": record.get("ttl", 3600),
-            "proxied": record.get("proxied", False)
-        }
-        if "priority" in record:
-            data["priority"] = record["priority"]
-
-        response = requests.post(url, headers=self.headers, json=data)
+        self.limiter = RateLimiter(*self.RATE_LIMIT, burst=self.RATE_BURST)
+        # Endpoint paths, relative to base_url, built once
+        self._records_url = f"zones/{self.zone_id}/dns_records"
+        self._record_url_tmpl = self._records_url + "/{}"
+
+        # A single HTTP/2 connection multiplexes every call as its own stream
+        # instead of queueing them behind one another on HTTP/1.1. No custom
+        # transport is passed, so httpx still honours HTTPS_PROXY/NO_PROXY.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client"""
+        await self.client.aclose()
+
+    @classmethod
+    def _retry_after(cls, response: httpx.Response) -> Optional[float]:
+        """Seconds the server asked us to wait via Retry-After, clamped to MAX_RETRY_AFTER"""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        # Rejects inf and nan, which would otherwise pause forever or not at all
+        if not math.isfinite(delay):
+            return None
+        return min(max(0.0, delay), cls.MAX_RETRY_AFTER)
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a rate-limited request, retrying on throttling and transient errors"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.ConnectError:
+                # Nothing reached the server, so any method is safe to retry
+                if attempt == self.MAX_RETRIES:
+                    raise
+                await asyncio.sleep(self.BACKOFF_FACTOR * (2 ** attempt))
+                continue
+            status = response.status_code
+            if (status not in self.RETRY_STATUSES or
+                (status != 429 and method not in self.RETRY_METHODS) or
+                attempt == self.MAX_RETRIES):
+                break
+
+            backoff = self.BACKOFF_FACTOR * (2 ** attempt)
+            if status == 429:
+                # Throttled: hold back every in-flight call, not just this one
+                delay = self._retry_after(response)
+                self.limiter.pause(backoff if delay is None else delay)
+            else:
+                await asyncio.sleep(backoff)
         response.raise_for_status()
-        return response.json()["result"]
+        return response
 
-    def update_record(self, record_id: str, record: Dict) -> Dict:
-        """Update an existing DNS record"""
-        url = f"{self.base_url}/zones/{self.zone_id}/dns_records/{record_id}"
+    async def list_records(self, **filters) -> List[Dict]:
+        """
+        List DNS records in the zone, following pagination
+        Optional filters (e.g. name=, type=) are passed through as query params
+        """
+        url = self._records_url
+
+        async def fetch_page(page: int) -> Dict:
+            params = {**filters, "per_page": self.PER_PAGE, "page": page}
+            response = await self._request("GET", url, params=params)
+            return orjson.loads(response.content)
+
+        # The first page tells us how many more there are; fetch those together
+        first = await fetch_page(1)
+        records = list(first["result"])
+        total_pages = first.get("result_info", {}).get("total_pages", 1)
+        for body in await asyncio.gather(*[fetch_page(p) for p in range(2, total_pages + 1)]):
+            records.extend(body["result"])
+        return records
+
+    async def find_records(self, name: str, type: str) -> List[Dict]:
+        """List the DNS records matching a single name and type"""
+        return await self.list_records(name=name, type=type)
+
+    @staticmethod
+    def to_cf_payload(record: Mapping) -> Dict:
+        """Build the Cloudflare API payload for a YAML record"""
         data = {
             "type": record["type"],
             "name": record["name"],
@@ -62,24 +228,109 @@ class CloudflareAPI:
         }
         if "priority" in record:
             data["priority"] = record["priority"]
-
-        response = requests.patch(url, headers=self.headers, json=data)
-        response.raise_for_status()
-        return response.json()["result"]
-
-    def delete_record(self, record_id: str) -> None:
+        return data
+
+    @staticmethod
+    def payload_delta(payload: Dict, cf_record: Dict) -> Dict:
+        """Reduce a payload to the fields that differ from the Cloudflare record"""
+        delta = {field: value for field, value in payload.items() if cf_record.get(field) != value}
+        # Nothing to narrow down to, so send the full payload as before
+        return delta or payload
+
+    async def create_record(self, payload: Dict) -> Dict:
+        """Create a new DNS record from a prebuilt payload"""
+        response = await self._request("POST", self._records_url, content=orjson.dumps(payload))
+        return orjson.loads(response.content)["result"]
+
+    async def update_record(self, record_id: str, payload: Dict) -> Dict:
+        """Update an existing DNS record; Cloudflare accepts partial payloads"""
+        url = self._record_url_tmpl.format(record_id)
+        response = await self._request("PATCH", url, content=orjson.dumps(payload))
+        return orjson.loads(response.content)["result"]
+
+    async def delete_record(self, record_id: str) -> None:
         """Delete a DNS record"""
-        url = f"{self.base_url}/zones/{self.zone_id}/dns_records/{record_id}"
-        response = requests.delete(url, headers=self.headers)
-        response.raise_for_status()
+        await self._request("DELETE", self._record_url_tmpl.format(record_id))
 
 
 class DNSSync:
     """Main DNS sync orchestrator"""
 
-    def __init__(self, api: CloudflareAPI, records_dir: str = "records"):
+    # Below this many changed files, look records up by (name, type)
+    # instead of listing the whole zone
+    LOOKUP_THRESHOLD = 20
+
+    # Fields (and their types) every record cache entry must carry
+    CACHE_FIELDS = {"mtime_ns": int, "size": int, "name": str, "type": str, "digest": str}
+
+    def __init__(self, api: CloudflareAPI, records_dir: str = "records", max_concurrency: int = 8,
+                 cache_path: Optional[str] = None):
         self.api = api
         self.records_dir = Path(records_dir)
+        # Matches .yaml/.yml files under records_dir in raw `git diff -z` paths
+        self._path_re = re.compile(re.escape(os.fsencode(str(self.records_dir))) + rb"/.*\.ya?ml", re.DOTALL)
+        # Cap in-flight API calls to stay under Cloudflare's per-zone limits
+        self.max_concurrency = max_concurrency
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cf_index: Dict[Tuple[str, str], Dict] = {}
+        self._deleted_blobs: Dict[str, str] = {}
+        self._kept_keys: Set[Tuple[str, str]] = set()
+        self._record_cache: Dict[str, Dict] = self.load_record_cache()
+
+    def load_record_cache(self) -> Dict[str, Dict]:
+        """
+        Load the on-disk record cache from a previous run
+        Maps filepath to the file's mtime, size, name, type and normalized digest
+        """
+        if not self.cache_path:
+            return {}
+        try:
+            data = orjson.loads(self.cache_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+
+        # Anything not shaped like our own output is ignored rather than trusted
+        if not isinstance(data, dict):
+            return {}
+        return {
+            filepath: entry for filepath, entry in data.items()
+            if isinstance(entry, dict) and all(
+                isinstance(entry.get(field), kind) for field, kind in self.CACHE_FIELDS.items()
+            )
+        }
+
+    def save_record_cache(self) -> None:
+        """Persist the record cache; failing to write it never fails the sync"""
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.write_bytes(orjson.dumps(self._record_cache))
+        except OSError as e:
+            print(f"⚠️  Could not write record cache: {e}")
+
+    def _cached_entry(self, filepath: str) -> Optional[Dict]:
+        """Return the cache entry for a file if it is unchanged since it was recorded"""
+        entry = self._record_cache.get(filepath)
+        if not entry:
+            return None
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        if entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            return None
+        return entry
+
+    def _remember(self, filepath: str, yaml_record: Mapping) -> None:
+        """Record a file's current stat and digest once Cloudflare matches it"""
+        stat = os.stat(filepath)
+        self._record_cache[filepath] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "name": yaml_record["name"],
+            "type": yaml_record["type"],
+            "digest": _digest(yaml_record),
+        }
 
     def get_changed_files(self) -> Dict[str, Set[str]]:
         """
@@ -90,97 +341,270 @@ class DNSSync:
         # In GitHub Actions, this will compare the pushed commit with its parent
         try:
             result = subprocess.run(
-                ["git", "diff", "--name-status", "HEAD~1", "HEAD"],
+                ["git", "diff", "--name-status", "--no-renames", "-z", "HEAD~1", "HEAD"],
                 capture_output=True,
-                text=True,
                 check=True
             )
         except subprocess.CalledProcessError:
             # If HEAD~1 doesn't exist (first commit), compare with empty tree
             result = subprocess.run(
-                ["git", "diff", "--name-status", "4b825dc642cb6eb9a060e54bf8d69288fbee4904", "HEAD"],
+                ["git", "diff", "--name-status", "--no-renames", "-z", "4b825dc642cb6eb9a060e54bf8d69288fbee4904", "HEAD"],
                 capture_output=True,
-                text=True,
                 check=True
             )
 
         changes = {"added": set(), "modified": set(), "deleted": set()}
 
-        for line in result.stdout.strip().split("\n"):
-            if not line:
+        # With -z, output is NUL-separated "status, path" fields and paths are
+        # left unquoted. --no-renames reports a rename (including a delete and
+        # an add git merely finds similar) as its deletion plus its addition.
+        fields = iter(result.stdout.split(b"\x00"))
+        kinds = {b"A": "added", b"M": "modified", b"D": "deleted"}
+        for status in fields:
+            if not status:
                 continue
-
-            parts = line.split("\t")
-            status = parts[0]
-            filepath = parts[1]
+            path = next(fields)
 
             # Only process files in records/ directory with .yaml or .yml extension
-            if not filepath.startswith(f"{self.records_dir}/"):
-                continue
-            if not (filepath.endswith(".yaml") or filepath.endswith(".yml")):
+            if not self._path_re.fullmatch(path):
                 continue
 
-            if status == "A":
-                changes["added"].add(filepath)
-            elif status == "M":
-                changes["modified"].add(filepath)
-            elif status == "D":
-                changes["deleted"].add(filepath)
+            kind = kinds.get(status)
+            if kind:
+                changes[kind].add(os.fsdecode(path))
+
+        # Deleted files only exist in history; read them all up front in one git call
+        self._deleted_blobs = self.read_deleted_files(changes["deleted"])
 
         return changes
 
-    def load_yaml_record(self, filepath: str) -> Dict:
+    def read_deleted_files(self, filepaths: Set[str]) -> Dict[str, str]:
+        """
+        Read the previous contents of deleted files from HEAD~1
+        Resolves blob IDs with one `git ls-tree` and reads them with one
+        `git cat-file --batch`, instead of one `git show` per file
+        """
+        if not filepaths:
+            return {}
+
+        # -z keeps paths with newlines or tabs intact; literal pathspecs stop
+        # glob characters in filenames from matching other files
+        result = subprocess.run(
+            ["git", "--literal-pathspecs", "ls-tree", "-r", "-z", "--full-tree",
+             "HEAD~1", "--", *sorted(filepaths)],
+            capture_output=True,
+            check=True
+        )
+        oids = {}
+        for entry in result.stdout.split(b"\x00"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            _mode, obj_type, oid = meta.split()
+            filepath = os.fsdecode(path)
+            if obj_type == b"blob" and filepath in filepaths:
+                oids[filepath] = oid.decode()
+        if not oids:
+            return {}
+
+        # Object IDs never contain newlines, so each input line is exactly one object
+        requested = sorted(set(oids.values()))
+        result = subprocess.run(
+            ["git", "cat-file", "--batch"],
+            input="".join(f"{oid}\n" for oid in requested).encode(),
+            capture_output=True,
+            check=True
+        )
+
+        # Output is one "<oid> <type> <size>" header plus contents per object
+        contents = {}
+        out = result.stdout
+        pos = 0
+        for oid in requested:
+            end = out.index(b"\n", pos)
+            header = out[pos:end].decode().split()
+            pos = end + 1
+            if len(header) != 3 or header[0] != oid or header[1] != "blob":
+                raise RuntimeError(f"Unexpected git cat-file output for {oid}: {' '.join(header)}")
+            size = int(header[2])
+            contents[oid] = out[pos:pos + size].decode()
+            pos += size + 1
+
+        blobs = {filepath: contents[oid] for filepath, oid in oids.items()}
+        return blobs
+
+    def load_yaml_record(self, filepath: str) -> Mapping:
         """Load a DNS record from a YAML file"""
-        with open(filepath, 'r') as f:
-            record = yaml.safe_load(f)
+        return _load_record(filepath)
+
+    def preload_records(self, filepaths: Set[str]) -> None:
+        """
+        Read and parse YAML files concurrently so later loads hit the parse cache
+        Failures are left for the file's own processing to report
+        """
+        def load(filepath: str) -> None:
+            try:
+                self.load_yaml_record(filepath)
+            except Exception:
+                pass
 
-        # Validate required fields
-        required = ["name", "type", "content"]
-        for field in required:
-            if field not in record:
-                raise ValueError(f"Missing required field '{field}' in {filepath}")
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            list(executor.map(load, sorted(filepaths)))
 
-        return record
+    def load_deleted_record(self, filepath: str) -> Dict:
+        """Load a deleted DNS record from its HEAD~1 contents"""
+        # For deleted files, we need to get the record info from git history
+        if filepath not in self._deleted_blobs:
+            raise FileNotFoundError(f"{filepath} not found in HEAD~1")
+        return yaml.load(self._deleted_blobs[filepath], Loader=SafeLoader)
 
-    def find_matching_record(self, yaml_record: Dict, cf_records: List[Dict]) -> Optional[Dict]:
+    def find_matching_record(self, yaml_record: Dict) -> Optional[Dict]:
         """
         Find a Cloudflare record matching the YAML record
         Match based on name and type
         """
-        for cf_record in cf_records:
-            if (cf_record["name"] == yaml_record["name"] and
-                cf_record["type"] == yaml_record["type"]):
-                return cf_record
-        return None
+        return self._cf_index.get((yaml_record["name"], yaml_record["type"]))
 
-    def records_differ(self, yaml_record: Dict, cf_record: Dict) -> bool:
+    def records_differ(self, yaml_record: Mapping, cf_record: Dict) -> bool:
         """Check if YAML record differs from Cloudflare record"""
-        fields = ["content", "ttl", "proxied"]
-        for field in fields:
-            yaml_value = yaml_record.get(field)
-            cf_value = cf_record.get(field)
+        return _norm(yaml_record) != _norm(cf_record)
+
+    async def _process_deletion(self, filepath: str) -> List[str]:
+        """Delete the Cloudflare record for a removed YAML file, returning log lines"""
+        log = [f"🗑️  Processing deletion: {filepath}"]
+        # The file is gone, so its record cache entry can never be used again
+        self._record_cache.pop(filepath, None)
+        try:
+            yaml_record = self.load_deleted_record(filepath)
+            key = (yaml_record["name"], yaml_record["type"])
+
+            # A renamed file shows up as a deletion plus an addition of the
+            # same record; the record is still wanted, so leave it alone
+            if key in self._kept_keys:
+                log.append(f"   ℹ️  Still defined by another file, keeping: {yaml_record['name']} ({yaml_record['type']})")
+                return log
+
+            cf_record = self.find_matching_record(yaml_record)
+            if cf_record:
+                await self.api.delete_record(cf_record["id"])
+                # Later batches must see the record as gone
+                self._cf_index.pop(key, None)
+                log.append(f"   ✅ Deleted: {yaml_record['name']} ({yaml_record['type']})")
+            else:
+                log.append(f"   ⚠️  Record not found in Cloudflare: {yaml_record['name']} ({yaml_record['type']})")
+        except Exception as e:
+            log.append(f"   ❌ Error: {e}")
+        return log
+
+    async def _process_addition(self, filepath: str) -> List[str]:
+        """Create the Cloudflare record for a new YAML file, returning log lines"""
+        log = [f"➕ Processing addition: {filepath}"]
+        try:
+            yaml_record = self.load_yaml_record(filepath)
+            payload = self.api.to_cf_payload(yaml_record)
+
+            # Check if record already exists (shouldn't, but let's be safe)
+            cf_record = self.find_matching_record(yaml_record)
+            if cf_record:
+                log.append(f"   ⚠️  Record already exists, will update instead")
+                if self.records_differ(yaml_record, cf_record):
+                    delta = self.api.payload_delta(payload, cf_record)
+                    await self.api.update_record(cf_record["id"], delta)
+                    log.append(f"   ✅ Updated: {yaml_record['name']} ({yaml_record['type']})")
+                else:
+                    log.append(f"   ℹ️  No changes needed")
+            else:
+                await self.api.create_record(payload)
+                log.append(f"   ✅ Created: {yaml_record['name']} ({yaml_record['type']})")
+        except Exception as e:
+            log.append(f"   ❌ Error: {e}")
+        return log
+
+    async def _process_modification(self, filepath: str) -> List[str]:
+        """Update the Cloudflare record for a changed YAML file, returning log lines"""
+        log = [f"📝 Processing modification: {filepath}"]
+        try:
+            # An untouched file whose last-synced digest matches Cloudflare
+            # needs neither parsing nor an API call
+            entry = self._cached_entry(filepath)
+            if entry:
+                cf_record = self._cf_index.get((entry["name"], entry["type"]))
+                if cf_record and _digest(cf_record) == entry["digest"]:
+                    log.append(f"   ℹ️  No changes needed")
+                    return log
+
+            yaml_record = self.load_yaml_record(filepath)
+            payload = self.api.to_cf_payload(yaml_record)
+
+            cf_record = self.find_matching_record(yaml_record)
+            if cf_record:
+                if self.records_differ(yaml_record, cf_record):
+                    delta = self.api.payload_delta(payload, cf_record)
+                    await self.api.update_record(cf_record["id"], delta)
+                    log.append(f"   ✅ Updated: {yaml_record['name']} ({yaml_record['type']})")
+                else:
+                    log.append(f"   ℹ️  No changes needed")
+            else:
+                # Record doesn't exist, create it
+                log.append(f"   ⚠️  Record not found, will create")
+                await self.api.create_record(payload)
+                log.append(f"   ✅ Created: {yaml_record['name']} ({yaml_record['type']})")
+            self._remember(filepath, yaml_record)
+        except Exception as e:
+            log.append(f"   ❌ Error: {e}")
+        return log
+
+    def record_keys(self, filepaths: Set[str], changes: Dict[str, Set[str]]) -> Set[Tuple[str, str]]:
+        """(name, type) of each record defined by the given changed files"""
+        keys = set()
+        for filepath in filepaths:
+            entry = self._cached_entry(filepath) if filepath in changes["modified"] else None
+            if entry:
+                keys.add((entry["name"], entry["type"]))
+                continue
+            try:
+                if filepath in changes["deleted"]:
+                    record = self.load_deleted_record(filepath)
+                else:
+                    record = self.load_yaml_record(filepath)
+                keys.add((record["name"], record["type"]))
+            except Exception:
+                # Reported when the file itself is processed
+                continue
+        return keys
 
-            # Handle ttl default
-            if field == "ttl":
-                yaml_value = yaml_value or 3600
-                cf_value = cf_value or 3600
+    async def lookup_changed_records(self, changes: Dict[str, Set[str]]) -> List[Dict]:
+        """Fetch only the Cloudflare records whose (name, type) appear in the changed files"""
+        keys = self.record_keys(changes["added"] | changes["modified"], changes)
+        keys |= self.record_keys(changes["deleted"], changes)
 
-            # Handle proxied default
-            if field == "proxied":
-                yaml_value = yaml_value if yaml_value is not None else False
-                cf_value = cf_value if cf_value is not None else False
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-            if yaml_value != cf_value:
-                return True
+        async def bounded(name: str, record_type: str) -> List[Dict]:
+            async with semaphore:
+                return await self.api.find_records(name, record_type)
 
-        # Check priority for MX, SRV records
-        if yaml_record["type"] in ["MX", "SRV"]:
-            if yaml_record.get("priority") != cf_record.get("priority"):
-                return True
+        results = await asyncio.gather(*[bounded(*key) for key in sorted(keys)])
+        return [cf_record for records in results for cf_record in records]
 
-        return False
+    async def _run_batch(self, process, filepaths: Set[str]) -> None:
+        """Run one kind of change concurrently, then print logs in a stable order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-    def sync(self):
+        async def bounded(filepath: str) -> List[str]:
+            async with semaphore:
+                return await process(filepath)
+
+        filepaths = sorted(filepaths)
+        results = await asyncio.gather(*[bounded(fp) for fp in filepaths], return_exceptions=True)
+        for filepath, result in zip(filepaths, results):
+            if isinstance(result, BaseException):
+                result = [f"❌ Error processing {filepath}: {result}"]
+            for line in result:
+                print(line)
+            print()
+
+    async def sync(self):
         """Main sync operation"""
         print("🔍 Detecting changes...")
         changes = self.get_changed_files()
@@ -195,97 +619,63 @@ class DNSSync:
         print(f"  Deleted: {len(changes['deleted'])}")
         print()
 
+        # Load phase: parse every YAML file we may need in parallel; modified
+        # files still matching the record cache may never need parsing at all
+        self.preload_records(
+            changes["added"] | {fp for fp in changes["modified"] if not self._cached_entry(fp)}
+        )
+
         # Fetch current Cloudflare records
-        print("☁️  Fetching current Cloudflare DNS records...")
-        cf_records = self.api.list_records()
-        print(f"   Found {len(cf_records)} existing records in Cloudflare")
+        total_changes = sum(len(paths) for paths in changes.values())
+        if total_changes < self.LOOKUP_THRESHOLD:
+            print("☁️  Looking up changed records in Cloudflare...")
+            cf_records = await self.lookup_changed_records(changes)
+            print(f"   Found {len(cf_records)} matching records in Cloudflare")
+        else:
+            print("☁️  Fetching current Cloudflare DNS records...")
+            cf_records = await self.api.list_records()
+            print(f"   Found {len(cf_records)} existing records in Cloudflare")
         print()
 
-        # Process deletions
-        for filepath in changes["deleted"]:
-            print(f"🗑️  Processing deletion: {filepath}")
-            try:
-                # For deleted files, we need to get the record info from git history
-                result = subprocess.run(
-                    ["git", "show", f"HEAD~1:{filepath}"],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                yaml_record = yaml.safe_load(result.stdout)
-
-                cf_record = self.find_matching_record(yaml_record, cf_records)
-                if cf_record:
-                    self.api.delete_record(cf_record["id"])
-                    print(f"   ✅ Deleted: {yaml_record['name']} ({yaml_record['type']})")
-                else:
-                    print(f"   ⚠️  Record not found in Cloudflare: {yaml_record['name']} ({yaml_record['type']})")
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-            print()
+        # Index by (name, type) so each lookup is O(1); the first record wins
+        # when Cloudflare holds several for the same key
+        self._cf_index = {}
+        for cf_record in cf_records:
+            self._cf_index.setdefault((cf_record["name"], cf_record["type"]), cf_record)
 
-        # Process additions
-        for filepath in changes["added"]:
-            print(f"➕ Processing addition: {filepath}")
-            try:
-                yaml_record = self.load_yaml_record(filepath)
-
-                # Check if record already exists (shouldn't, but let's be safe)
-                cf_record = self.find_matching_record(yaml_record, cf_records)
-                if cf_record:
-                    print(f"   ⚠️  Record already exists, will update instead")
-                    if self.records_differ(yaml_record, cf_record):
-                        self.api.update_record(cf_record["id"], yaml_record)
-                        print(f"   ✅ Updated: {yaml_record['name']} ({yaml_record['type']})")
-                    else:
-                        print(f"   ℹ️  No changes needed")
-                else:
-                    self.api.create_record(yaml_record)
-                    print(f"   ✅ Created: {yaml_record['name']} ({yaml_record['type']})")
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-            print()
+        # Records still defined by an added or modified file are never deleted
+        self._kept_keys = self.record_keys(changes["added"] | changes["modified"], changes)
 
-        # Process modifications
-        for filepath in changes["modified"]:
-            print(f"📝 Processing modification: {filepath}")
-            try:
-                yaml_record = self.load_yaml_record(filepath)
-
-                cf_record = self.find_matching_record(yaml_record, cf_records)
-                if cf_record:
-                    if self.records_differ(yaml_record, cf_record):
-                        self.api.update_record(cf_record["id"], yaml_record)
-                        print(f"   ✅ Updated: {yaml_record['name']} ({yaml_record['type']})")
-                    else:
-                        print(f"   ℹ️  No changes needed")
-                else:
-                    # Record doesn't exist, create it
-                    print(f"   ⚠️  Record not found, will create")
-                    self.api.create_record(yaml_record)
-                    print(f"   ✅ Created: {yaml_record['name']} ({yaml_record['type']})")
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-            print()
+        # Records within a batch are independent, but deletions still go
+        # first so a replacement record never collides with the old one
+        await self._run_batch(self._process_deletion, changes["deleted"])
+        await self._run_batch(self._process_addition, changes["added"])
+        await self._run_batch(self._process_modification, changes["modified"])
+        self.save_record_cache()
 
         print("🎉 Sync complete!")
 
 
+async def run(api_token: str, zone_id: str, cache_path: Optional[str] = None):
+    # Initialize API and sync
+    async with CloudflareAPI(api_token, zone_id) as api:
+        sync = DNSSync(api, cache_path=cache_path)
+        await sync.sync()
+
+
 def main():
     # Load environment variables
     api_token = os.getenv("CLOUDFLARE_API_TOKEN")
     zone_id = os.getenv("CLOUDFLARE_ZONE_ID")
+    # Optional: where to keep the record cache between runs (off when unset)
+    cache_path = os.getenv("DNS_SYNC_CACHE")
 
     if not api_token or not zone_id:
         print("❌ Error: CLOUDFLARE_API_TOKEN and CLOUDFLARE_ZONE_ID must be set")
         sys.exit(1)
 
-    # Initialize API and sync
-    api = CloudflareAPI(api_token, zone_id)
-    sync = DNSSync(api)
-
     try:
-        sync.sync()
+        asyncio.run(run(api_token, zone_id, cache_path))
     except Exception as e:
         print(f"❌ Fatal error: {e}")
         sys.exit(1)
@@ -0,0 +1,111 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+# sync.py is a standalone script at the repo root, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import sync  # noqa: E402
+
+
+class GitRepo:
+    """Throwaway git repository for exercising the git-facing parts of DNSSync"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.git("init", "-q")
+        self.git("config", "user.email", "test@example.com")
+        self.git("config", "user.name", "Test")
+        self.git("config", "commit.gpgsign", "false")
+
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=self.root, check=True, capture_output=True)
+
+    def write(self, path: str, content: str) -> None:
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+    def commit(self, message: str = "commit") -> None:
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return GitRepo(tmp_path)
+
+
+class FakeCloudflare:
+    """In-memory stand-in for the DNS records API, served through httpx.MockTransport"""
+
+    def __init__(self, records=()):
+        self.records = {record["id"]: dict(record) for record in records}
+        self.calls = []
+        self._next_id = 1000
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = orjson.loads(request.content) if request.content else None
+        record_id = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        if record_id == "dns_records":
+            record_id = None
+        self.calls.append((request.method, record_id, dict(request.url.params), body))
+
+        if request.method == "GET":
+            params = request.url.params
+            matches = [
+                r for r in self.records.values()
+                if params.get("name", r["name"]) == r["name"] and params.get("type", r["type"]) == r["type"]
+            ]
+            return httpx.Response(200, json={"result": matches, "result_info": {"total_pages": 1}})
+        if request.method == "POST":
+            self._next_id += 1
+            record = dict(body, id=str(self._next_id))
+            self.records[record["id"]] = record
+            return httpx.Response(200, json={"result": record})
+        if record_id not in self.records:
+            return httpx.Response(404, json={"success": False})
+        if request.method == "PATCH":
+            self.records[record_id].update(body)
+            return httpx.Response(200, json={"result": self.records[record_id]})
+        if request.method == "DELETE":
+            del self.records[record_id]
+            return httpx.Response(200, json={"result": {"id": record_id}})
+        return httpx.Response(405)
+
+    @property
+    def writes(self):
+        return [call for call in self.calls if call[0] != "GET"]
+
+    def run_sync(self, **kwargs) -> "sync.DNSSync":
+        """Run one DNSSync.sync() against this fake from the current directory"""
+        kwargs.setdefault("cache_path", None)
+
+        async def run():
+            api = sync.CloudflareAPI("token", "zone")
+            await api.client.aclose()
+            api.client = httpx.AsyncClient(
+                base_url=api.base_url,
+                headers=api.headers,
+                transport=httpx.MockTransport(self.handler),
+            )
+            async with api:
+                dns_sync = sync.DNSSync(api, **kwargs)
+                await dns_sync.sync()
+                return dns_sync
+
+        return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def clear_parse_cache():
+    # Parsed records are cached per relative path, which repeats across test repos
+    sync._load_record.cache_clear()
+    yield
+    sync._load_record.cache_clear()
@@ -0,0 +1,640 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+import sync
+from conftest import FakeCloudflare
+
+
+def record_yaml(name: str, type: str = "A", content: str = "192.0.2.1") -> str:
+    return f"name: {name}\ntype: {type}\ncontent: {content}\n"
+
+
+def make_api(handler) -> sync.CloudflareAPI:
+    """CloudflareAPI whose HTTP client is served by `handler` instead of the network"""
+    api = sync.CloudflareAPI("token", "zone")
+    api.client = httpx.AsyncClient(
+        base_url=api.base_url,
+        headers=api.headers,
+        transport=httpx.MockTransport(handler),
+    )
+    return api
+
+
+def make_sync(**kwargs) -> sync.DNSSync:
+    return sync.DNSSync(api=None, cache_path=None, **kwargs)
+
+
+# get_changed_files
+
+def test_changed_files_classifies_added_modified_deleted(repo):
+    repo.write("records/keep.yaml", record_yaml("keep.example.com"))
+    repo.write("records/gone.yml", record_yaml("gone.example.com"))
+    repo.commit()
+    repo.write("records/keep.yaml", record_yaml("keep.example.com", content="192.0.2.2"))
+    repo.write("records/new.yaml", record_yaml("new.example.com"))
+    (repo.root / "records/gone.yml").unlink()
+    repo.commit()
+
+    changes = make_sync().get_changed_files()
+
+    assert changes == {
+        "added": {"records/new.yaml"},
+        "modified": {"records/keep.yaml"},
+        "deleted": {"records/gone.yml"},
+    }
+
+
+def test_changed_files_ignores_paths_outside_records_and_other_extensions(repo):
+    repo.write("README.md", "readme\n")
+    repo.commit()
+    repo.write("README.md", "changed\n")
+    repo.write("other/www.yaml", record_yaml("www.example.com"))
+    repo.write("records/notes.txt", "notes\n")
+    repo.write("records/www.yaml.bak", record_yaml("www.example.com"))
+    repo.write("recordsx/www.yaml", record_yaml("www.example.com"))
+    repo.write("records/nested/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+
+    changes = make_sync().get_changed_files()
+
+    assert changes["added"] == {"records/nested/www.yaml"}
+    assert not changes["modified"] and not changes["deleted"]
+
+
+def test_changed_files_reports_renames_as_deletion_and_addition(repo):
+    repo.write("records/old.yaml", record_yaml("www.example.com"))
+    repo.write("records/edit.yaml", record_yaml("edit.example.com"))
+    repo.commit()
+    repo.git("mv", "records/old.yaml", "records/renamed.yaml")
+    repo.write("records/edit.yaml", record_yaml("edit.example.com", content="192.0.2.9"))
+    repo.write("records/added.yaml", record_yaml("added.example.com"))
+    repo.commit()
+
+    changes = make_sync().get_changed_files()
+
+    assert changes == {
+        "added": {"records/added.yaml", "records/renamed.yaml"},
+        "modified": {"records/edit.yaml"},
+        "deleted": {"records/old.yaml"},
+    }
+
+
+def test_changed_files_handles_spaces_tabs_newlines_and_non_ascii(repo):
+    repo.write("records/base.yaml", record_yaml("base.example.com"))
+    repo.commit()
+    odd = ["records/with space.yaml", "records/tab\there.yaml", "records/new\nline.yml", "records/café.yaml"]
+    for path in odd:
+        repo.write(path, record_yaml("odd.example.com"))
+    repo.commit()
+
+    changes = make_sync().get_changed_files()
+
+    assert changes["added"] == set(odd)
+
+
+def test_changed_files_on_first_commit_compares_with_empty_tree(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+
+    changes = make_sync().get_changed_files()
+
+    assert changes["added"] == {"records/www.yaml"}
+
+
+# read_deleted_files
+
+def test_read_deleted_files_returns_previous_contents(repo):
+    repo.write("records/a.yaml", record_yaml("a.example.com"))
+    repo.write("records/b.yaml", record_yaml("b.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/a.yaml", "records/b.yaml")
+    repo.commit()
+
+    blobs = make_sync().read_deleted_files({"records/a.yaml", "records/b.yaml"})
+
+    assert blobs == {
+        "records/a.yaml": record_yaml("a.example.com"),
+        "records/b.yaml": record_yaml("b.example.com"),
+    }
+
+
+def test_read_deleted_files_omits_paths_missing_from_history(repo):
+    repo.write("records/a.yaml", record_yaml("a.example.com"))
+    repo.commit()
+    repo.write("records/b.yaml", record_yaml("b.example.com"))
+    repo.commit()
+
+    blobs = make_sync().read_deleted_files({"records/a.yaml", "records/missing.yaml"})
+
+    assert blobs == {"records/a.yaml": record_yaml("a.example.com")}
+
+
+def test_read_deleted_files_keeps_odd_paths_aligned(repo):
+    # A newline in a path must not shift later files onto the wrong blob
+    paths = {
+        "records/a\nb.yaml": record_yaml("ab.example.com"),
+        "records/b.yaml": record_yaml("b.example.com"),
+        "records/c.yaml": record_yaml("c.example.com"),
+        "records/*.yaml": record_yaml("star.example.com"),
+        "records/dup.yaml": record_yaml("b.example.com"),
+    }
+    for path, content in paths.items():
+        repo.write(path, content)
+    repo.commit()
+    repo.git("rm", "-q", "--", *paths)
+    repo.commit()
+
+    sync_ = make_sync()
+    changes = sync_.get_changed_files()
+
+    assert changes["deleted"] == set(paths)
+    assert sync_._deleted_blobs == paths
+    assert sync_.load_deleted_record("records/c.yaml")["name"] == "c.example.com"
+
+
+def test_read_deleted_files_with_no_paths_runs_nothing(repo):
+    assert make_sync().read_deleted_files(set()) == {}
+
+
+# list_records
+
+def test_list_records_follows_pagination():
+    records = [{"id": str(i), "name": f"r{i}.example.com", "type": "A"} for i in range(5)]
+    seen = []
+
+    def handler(request):
+        params = request.url.params
+        seen.append(dict(params))
+        page = int(params["page"])
+        per_page = 2
+        return httpx.Response(200, json={
+            "result": records[(page - 1) * per_page:page * per_page],
+            "result_info": {"page": page, "total_pages": 3},
+        })
+
+    async def run():
+        async with make_api(handler) as api:
+            return await api.list_records(name="r1.example.com")
+
+    assert asyncio.run(run()) == records
+    assert sorted(int(p["page"]) for p in seen) == [1, 2, 3]
+    assert all(p["per_page"] == "1000" and p["name"] == "r1.example.com" for p in seen)
+
+
+def test_list_records_single_page_without_result_info():
+    def handler(request):
+        return httpx.Response(200, json={"result": [{"id": "1"}]})
+
+    async def run():
+        async with make_api(handler) as api:
+            return await api.list_records()
+
+    assert asyncio.run(run()) == [{"id": "1"}]
+
+
+# _request
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(sync.CloudflareAPI, "BACKOFF_FACTOR", 0)
+
+
+def test_request_retries_429_after_retry_after_for_any_method(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200, json={"result": {"id": "new"}})
+
+    async def run():
+        async with make_api(handler) as api:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await api.create_record({"name": "www.example.com"})
+            return result, loop.time() - start
+
+    result, elapsed = asyncio.run(run())
+
+    assert result == {"id": "new"}
+    assert calls == ["POST", "POST"]
+    assert elapsed >= 0.2
+
+
+def test_request_gives_up_after_max_retries(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+    async def run():
+        async with make_api(handler) as api:
+            await api.list_records()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert len(calls) == sync.CloudflareAPI.MAX_RETRIES + 1
+
+
+def test_request_does_not_retry_non_idempotent_server_errors(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(503)
+
+    async def run():
+        async with make_api(handler) as api:
+            await api.update_record("1", {"content": "192.0.2.2"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert calls == ["PATCH"]
+
+
+def test_request_retries_idempotent_server_errors(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"result": {}})
+
+    async def run():
+        async with make_api(handler) as api:
+            await api.delete_record("1")
+
+    asyncio.run(run())
+    assert calls == ["DELETE"] * 3
+
+
+def test_request_retries_connect_errors_for_any_method(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"result": {"id": "new"}})
+
+    async def run():
+        async with make_api(handler) as api:
+            return await api.create_record({"name": "www.example.com"})
+
+    assert asyncio.run(run()) == {"id": "new"}
+    assert calls == ["POST"] * 3
+
+
+def test_request_raises_connect_error_after_max_retries(no_backoff):
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def run():
+        async with make_api(handler) as api:
+            await api.list_records()
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
+
+
+def test_client_honours_proxy_environment(monkeypatch):
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example.com:3128")
+
+    api = sync.CloudflareAPI("token", "zone")
+
+    assert api.client._mounts
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("-3", 0.0),
+    ("99999", sync.CloudflareAPI.MAX_RETRY_AFTER),
+    ("inf", None),
+    ("nan", None),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ("soon", None),
+])
+def test_retry_after_parsing(value, expected):
+    response = httpx.Response(429, headers={"Retry-After": value})
+    assert sync.CloudflareAPI._retry_after(response) == expected
+
+
+# Record cache
+
+@pytest.mark.parametrize("content", [b"[]", b'"x"', b'{"records/a.yaml": {"size": 1}}', b"{not json"])
+def test_malformed_record_cache_is_ignored(tmp_path, content):
+    cache = tmp_path / "cache.json"
+    cache.write_bytes(content)
+
+    assert sync.DNSSync(api=None, cache_path=str(cache))._record_cache == {}
+
+
+def test_record_cache_round_trips(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    sync_ = sync.DNSSync(api=None, cache_path="cache.json")
+    sync_._remember("records/www.yaml", sync.yaml.safe_load(record_yaml("www.example.com")))
+    sync_.save_record_cache()
+
+    reloaded = sync.DNSSync(api=None, cache_path="cache.json")
+
+    entry = reloaded._cached_entry("records/www.yaml")
+    assert entry["name"] == "www.example.com"
+    assert orjson.loads((repo.root / "cache.json").read_bytes()) == reloaded._record_cache
+
+
+# sync()
+
+def cf_record(id: str, name: str, type: str = "A", content: str = "192.0.2.1", **extra) -> dict:
+    return {"id": id, "name": name, "type": type, "content": content, "ttl": 3600, "proxied": False, **extra}
+
+
+def test_sync_rename_keeps_the_live_record(repo):
+    repo.write("records/old.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.git("mv", "records/old.yaml", "records/www-record.yaml")
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    cloudflare.run_sync()
+
+    assert cloudflare.writes == []
+    assert list(cloudflare.records) == ["1"]
+
+
+def test_sync_rename_with_new_content_updates_in_place(repo):
+    repo.write("records/old.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/old.yaml")
+    repo.write("records/www-record.yaml", record_yaml("www.example.com", content="192.0.2.7"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    cloudflare.run_sync()
+
+    assert cloudflare.writes == [("PATCH", "1", {}, {"content": "192.0.2.7"})]
+    assert cloudflare.records["1"]["content"] == "192.0.2.7"
+
+
+def test_sync_deletion_drops_record_from_index(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/www.yaml")
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    dns_sync = cloudflare.run_sync()
+
+    assert cloudflare.writes == [("DELETE", "1", {}, None)]
+    assert ("www.example.com", "A") not in dns_sync._cf_index
+
+
+def test_sync_applies_deletions_additions_and_modifications(repo, capsys):
+    repo.write("records/gone.yaml", record_yaml("gone.example.com"))
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/gone.yaml")
+    repo.write("records/www.yaml", record_yaml("www.example.com", content="192.0.2.2"))
+    repo.write("records/mail.yaml", "name: example.com\ntype: MX\ncontent: mail.example.com\npriority: 10\n")
+    repo.commit()
+    cloudflare = FakeCloudflare([
+        cf_record("1", "gone.example.com"),
+        cf_record("2", "www.example.com"),
+        cf_record("3", "unmanaged.example.com"),
+    ])
+
+    cloudflare.run_sync()
+
+    assert sorted(cloudflare.writes, key=lambda call: call[0]) == [
+        ("DELETE", "1", {}, None),
+        ("PATCH", "2", {}, {"content": "192.0.2.2"}),
+        ("POST", None, {}, {
+            "type": "MX", "name": "example.com", "content": "mail.example.com",
+            "ttl": 3600, "proxied": False, "priority": 10,
+        }),
+    ]
+    assert "3" in cloudflare.records
+    out = capsys.readouterr().out
+    # Deletions are logged before additions, which come before modifications
+    assert out.index("Processing deletion") < out.index("Processing addition") < out.index("Processing modification")
+
+
+def test_sync_reports_bad_files_without_stopping_the_batch(repo, capsys):
+    repo.write("records/base.yaml", record_yaml("base.example.com"))
+    repo.commit()
+    repo.write("records/bad.yaml", "name: bad.example.com\n")
+    repo.write("records/good.yaml", record_yaml("good.example.com"))
+    repo.commit()
+    cloudflare = FakeCloudflare()
+
+    cloudflare.run_sync()
+
+    assert [call[0] for call in cloudflare.writes] == ["POST"]
+    assert "Missing required field 'type' in records/bad.yaml" in capsys.readouterr().out
+
+
+def test_sync_without_record_changes_calls_nothing(repo, capsys):
+    repo.write("README.md", "readme\n")
+    repo.commit()
+    repo.write("README.md", "changed\n")
+    repo.commit()
+    cloudflare = FakeCloudflare()
+
+    cloudflare.run_sync()
+
+    assert cloudflare.calls == []
+    assert "No DNS record changes detected" in capsys.readouterr().out
+
+
+# Record matching
+
+def test_find_matching_record_uses_first_record_per_name_and_type(repo):
+    repo.write("records/base.yaml", record_yaml("base.example.com"))
+    repo.commit()
+    repo.write("records/txt.yaml", record_yaml("example.com", type="TXT", content="v=spf1 -all"))
+    repo.commit()
+    cloudflare = FakeCloudflare([
+        cf_record("1", "example.com", type="TXT", content="v=spf1 -all"),
+        cf_record("2", "example.com", type="TXT", content="other"),
+        cf_record("3", "example.com", type="A"),
+    ])
+
+    dns_sync = cloudflare.run_sync()
+
+    assert dns_sync.find_matching_record({"name": "example.com", "type": "TXT"})["id"] == "1"
+    assert dns_sync.find_matching_record({"name": "missing.example.com", "type": "TXT"}) is None
+    assert cloudflare.writes == []
+
+
+# Small-diff lookups
+
+def test_small_diff_looks_up_only_changed_records(repo):
+    repo.write("records/gone.yaml", record_yaml("gone.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/gone.yaml")
+    repo.write("records/www.yaml", record_yaml("www.example.com", type="CNAME", content="target.example.com"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "gone.example.com"), cf_record("2", "other.example.com")])
+
+    cloudflare.run_sync()
+
+    lookups = sorted((params["name"], params["type"]) for method, _, params, _ in cloudflare.calls if method == "GET")
+    assert lookups == [("gone.example.com", "A"), ("www.example.com", "CNAME")]
+
+
+def test_large_diff_lists_the_whole_zone(repo, monkeypatch):
+    monkeypatch.setattr(sync.DNSSync, "LOOKUP_THRESHOLD", 2)
+    repo.write("records/base.yaml", record_yaml("base.example.com"))
+    repo.commit()
+    repo.write("records/a.yaml", record_yaml("a.example.com"))
+    repo.write("records/b.yaml", record_yaml("b.example.com"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "a.example.com")])
+
+    cloudflare.run_sync()
+
+    gets = [params for method, _, params, _ in cloudflare.calls if method == "GET"]
+    assert gets == [{"per_page": "1000", "page": "1"}]
+    assert [call[0] for call in cloudflare.writes] == ["POST"]
+
+
+# Record comparison
+
+@pytest.mark.parametrize("yaml_record, cf, differ", [
+    ({"content": "192.0.2.1"}, {"content": "192.0.2.1", "ttl": 3600, "proxied": False}, False),
+    ({"content": "192.0.2.1", "ttl": None}, {"content": "192.0.2.1", "ttl": 3600}, False),
+    ({"content": "192.0.2.1", "ttl": 300}, {"content": "192.0.2.1", "ttl": 3600}, True),
+    ({"content": "192.0.2.1"}, {"content": "192.0.2.1", "proxied": None}, False),
+    ({"content": "192.0.2.1", "proxied": True}, {"content": "192.0.2.1", "proxied": False}, True),
+    ({"content": "192.0.2.2"}, {"content": "192.0.2.1"}, True),
+    # Priority only matters for MX and SRV
+    ({"content": "192.0.2.1", "priority": 5}, {"content": "192.0.2.1", "priority": 10}, False),
+])
+def test_records_differ_applies_defaults(yaml_record, cf, differ):
+    yaml_record = {"name": "www.example.com", "type": "A", **yaml_record}
+    cf = {"name": "www.example.com", "type": "A", **cf}
+    assert make_sync().records_differ(yaml_record, cf) is differ
+
+
+def test_records_differ_compares_priority_for_mx():
+    yaml_record = {"name": "example.com", "type": "MX", "content": "mail.example.com", "priority": 10}
+    cf = dict(yaml_record, priority=20)
+
+    assert make_sync().records_differ(yaml_record, cf) is True
+    assert make_sync().records_differ(yaml_record, dict(cf, priority=10)) is False
+
+
+# Payloads
+
+def test_to_cf_payload_applies_defaults_and_optional_priority():
+    assert sync.CloudflareAPI.to_cf_payload({"name": "www.example.com", "type": "A", "content": "192.0.2.1"}) == {
+        "type": "A", "name": "www.example.com", "content": "192.0.2.1", "ttl": 3600, "proxied": False,
+    }
+    mx = {"name": "example.com", "type": "MX", "content": "mail.example.com", "priority": 10, "description": "x"}
+    assert sync.CloudflareAPI.to_cf_payload(mx)["priority"] == 10
+    assert "description" not in sync.CloudflareAPI.to_cf_payload(mx)
+
+
+def test_payload_delta_keeps_only_changed_fields():
+    payload = {"type": "A", "name": "www.example.com", "content": "192.0.2.2", "ttl": 300, "proxied": False}
+    current = cf_record("1", "www.example.com")
+
+    assert sync.CloudflareAPI.payload_delta(payload, current) == {"content": "192.0.2.2", "ttl": 300}
+
+
+def test_payload_delta_falls_back_to_full_payload():
+    # An MX record that lost its priority in YAML differs, but no payload field does
+    payload = {"type": "MX", "name": "example.com", "content": "mail.example.com", "ttl": 3600, "proxied": False}
+    current = cf_record("1", "example.com", type="MX", content="mail.example.com", priority=10)
+
+    assert sync.CloudflareAPI.payload_delta(payload, current) == payload
+
+
+# Preloading
+
+def test_preload_records_fills_the_parse_cache_and_swallows_errors(repo):
+    repo.write("records/a.yaml", record_yaml("a.example.com"))
+    repo.write("records/b.yaml", record_yaml("b.example.com"))
+    repo.write("records/bad.yaml", "name: bad.example.com\n")
+
+    make_sync().preload_records({"records/a.yaml", "records/b.yaml", "records/bad.yaml", "records/missing.yaml"})
+
+    assert sync._load_record.cache_info().currsize == 2
+    # Now served from the cache even though the file has changed on disk
+    repo.write("records/a.yaml", record_yaml("changed.example.com"))
+    assert make_sync().load_yaml_record("records/a.yaml")["name"] == "a.example.com"
+    with pytest.raises(ValueError):
+        make_sync().load_yaml_record("records/bad.yaml")
+
+
+def test_sync_second_run_skips_cached_modifications(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.write("records/www.yaml", record_yaml("www.example.com", content="192.0.2.2"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    cloudflare.run_sync(cache_path="cache.json")
+    assert [call[0] for call in cloudflare.writes] == ["PATCH"]
+
+    cloudflare.calls.clear()
+    sync._load_record.cache_clear()
+    cloudflare.run_sync(cache_path="cache.json")
+
+    assert cloudflare.writes == []
+    assert sync._load_record.cache_info().misses == 0
+
+
+def test_sync_cache_hit_still_updates_records_changed_in_cloudflare(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.write("records/www.yaml", record_yaml("www.example.com", content="192.0.2.2"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+    cloudflare.run_sync(cache_path="cache.json")
+
+    # Someone edits the record in the dashboard between runs
+    cloudflare.records["1"]["content"] = "192.0.2.99"
+    cloudflare.calls.clear()
+    cloudflare.run_sync(cache_path="cache.json")
+
+    assert cloudflare.writes == [("PATCH", "1", {}, {"content": "192.0.2.2"})]
+
+
+def test_sync_drops_cache_entries_for_deleted_files(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.git("rm", "-q", "records/www.yaml")
+    repo.commit()
+    (repo.root / "cache.json").write_bytes(orjson.dumps({"records/www.yaml": {
+        "mtime_ns": 1, "size": 1, "name": "www.example.com", "type": "A", "digest": "x",
+    }}))
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    cloudflare.run_sync(cache_path="cache.json")
+
+    assert orjson.loads((repo.root / "cache.json").read_bytes()) == {}
+
+
+def test_record_cache_is_off_by_default(repo):
+    repo.write("records/www.yaml", record_yaml("www.example.com"))
+    repo.commit()
+    repo.write("records/www.yaml", record_yaml("www.example.com", content="192.0.2.2"))
+    repo.commit()
+    cloudflare = FakeCloudflare([cf_record("1", "www.example.com")])
+
+    async def run():
+        api = sync.CloudflareAPI("token", "zone")
+        await api.client.aclose()
+        api.client = httpx.AsyncClient(base_url=api.base_url, transport=httpx.MockTransport(cloudflare.handler))
+        async with api:
+            await sync.DNSSync(api).sync()
+
+    asyncio.run(run())
+
+    assert sorted(path.name for path in repo.root.iterdir()) == [".git", "records"]